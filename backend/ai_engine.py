@@ -1,7 +1,17 @@
+import io
 import os
 import json
-from typing import Dict, List
-from pypdf import PdfReader
+import asyncio
+import hashlib
+import re
+import threading
+from concurrent.futures import Executor
+from concurrent.futures.process import BrokenProcessPool
+from functools import wraps
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from typing_extensions import TypedDict  # pydantic (used by the SDK for schemas) needs this on Python < 3.12
+import orjson
+from cachetools import LRUCache, TTLCache
 from dotenv import load_dotenv
 import google.generativeai as genai
 
@@ -23,29 +33,263 @@ except Exception as e:
 
 USE_MOCK = False
 
+# Cap on in-flight Gemini requests per process, so fan-outs such as a whole
+# interview submitted at once don't trip the API's rate limits
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "10"))
+_llm_slots = asyncio.Semaphore(LLM_CONCURRENCY)
+
+# Response cache: exact match on SHA-256(prompt), with an optional semantic
+# fallback when sentence-transformers is installed (FAISS is used if present).
+# Semantic matches are only looked up among entries with the same exact scope
+# (e.g. the same resume), since MiniLM only reads the first 256 word pieces.
+LLM_CACHE_SIZE = 10_000
+LLM_CACHE_TTL = 3600
+SEMANTIC_CACHE_THRESHOLD = 0.95
+SEMANTIC_SCOPES = 1024
+SEMANTIC_SCOPE_SIZE = 64
+
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+# PDF extraction: prefer PyMuPDF (C library), fall back to pure-Python pypdf
+try:
+    import pymupdf
+    try:
+        from . import pdf_pages
+    except ImportError:
+        import pdf_pages
+except ImportError:
+    pymupdf = None
+    from pypdf import PdfReader
+
+def _available_cpus() -> int:
+    """CPUs this process may run on (the container's share, not the host's count)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS / Windows
+        return os.cpu_count() or 1
+
+
+# Large PDFs are split across a process pool (see extract_text_from_pdf_bytes).
+# Every uvicorn worker gets its own pool and each task receives a copy of the
+# PDF, so keep the pool small.
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(_available_cpus(), 4))))
+PARALLEL_PDF_MIN_PAGES = 32
+
+
+class SemanticIndex:
+    """Inner-product index over normalized embeddings with a parallel list of values"""
+
+    def __init__(self, dim: int, maxsize: int = LLM_CACHE_SIZE):
+        self.dim = dim
+        self.maxsize = maxsize
+        self.values: List = []
+        self._index = faiss.IndexFlatIP(dim) if faiss is not None else None
+        self._matrix = np.empty((0, dim), dtype=np.float32)
+
+    def search(self, vector, threshold: float):
+        """Return the value of the closest entry if its cosine >= threshold"""
+        if not self.values:
+            return None
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        if self._index is not None:
+            sims, ids = self._index.search(vector, 1)
+            best, score = int(ids[0][0]), float(sims[0][0])
+        else:
+            sims = self._matrix @ vector[0]
+            best = int(sims.argmax())
+            score = float(sims[best])
+        return self.values[best] if score >= threshold else None
+
+    def add(self, vector, value):
+        if len(self.values) >= self.maxsize:
+            # Simple bound on memory: start over rather than track eviction order
+            self.values.clear()
+            if self._index is not None:
+                self._index.reset()
+            self._matrix = np.empty((0, self.dim), dtype=np.float32)
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        if self._index is not None:
+            self._index.add(vector)
+        else:
+            self._matrix = np.vstack([self._matrix, vector])
+        self.values.append(value)
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def embed_text(text: str):
+    """Embed text with MiniLM (normalized), or return None if unavailable"""
+    global _embedder
+    if SentenceTransformer is None:
+        return None
+    with _embedder_lock:
+        if _embedder is None:
+            try:
+                _embedder = SentenceTransformer('all-MiniLM-L6-v2')
+            except Exception as e:
+                print(f"Semantic cache disabled, embedding model failed to load: {e}")
+                _embedder = False
+    if _embedder is False:
+        return None
+    return _embedder.encode(text, normalize_embeddings=True)
+
+
+_llm_cache: TTLCache = TTLCache(maxsize=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL)
+# One small SemanticIndex per (namespace, scope digest)
+_semantic_indexes: LRUCache = LRUCache(maxsize=SEMANTIC_SCOPES)
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+async def lookup_cached(prompt: str, namespace: str, semantic_key: Optional[str] = None, semantic_scope: str = ""):
+    """Return (cached value or None, embedding to pass to store_cached).
+
+    Exact match on the prompt first; then, if semantic_key is given, the closest
+    embedding of semantic_key among entries stored with the same semantic_scope.
+    """
+    key = (namespace, _digest(prompt))
+    hit = _llm_cache.get(key)
+    if hit is not None:
+        return hit, None
+    if semantic_key is None or SentenceTransformer is None:
+        return None, None
+
+    # Embedding is CPU-bound, keep it off the event loop
+    vector = await asyncio.to_thread(embed_text, semantic_key)
+    if vector is None:
+        return None, None
+    index = _semantic_indexes.get((namespace, _digest(semantic_scope)))
+    hit = index.search(vector, SEMANTIC_CACHE_THRESHOLD) if index else None
+    if hit is not None:
+        print(f"Semantic cache hit ({namespace})")
+        _llm_cache[key] = hit
+    return hit, vector
+
+
+def store_cached(prompt: str, namespace: str, value, vector=None, semantic_scope: str = "") -> None:
+    """Cache value for prompt, and under its embedding if lookup_cached returned one"""
+    _llm_cache[(namespace, _digest(prompt))] = value
+    if vector is not None:
+        scope = (namespace, _digest(semantic_scope))
+        index = _semantic_indexes.get(scope)
+        if index is None:
+            index = _semantic_indexes[scope] = SemanticIndex(len(vector), maxsize=SEMANTIC_SCOPE_SIZE)
+        index.add(vector, value)
+
+
+def cached_llm(func):
+    """Cache LLM responses per namespace (exact prompt match, then semantic match).
+
+    Callers pass namespace= so that e.g. an evaluation is never served for an
+    analysis prompt. Semantic matching is opt-in: semantic_key= is the text to
+    embed and semantic_scope= must match exactly (see lookup_cached). With
+    parse=, the response is parsed before it is cached and the parsed value is
+    returned; a response that fails to parse raises and is not cached, so a
+    retry goes back to the model. The cache is only touched from the event
+    loop, so it needs no lock.
+    """
+    @wraps(func)
+    async def wrapper(prompt: str, *args, namespace: str = "default", semantic_key: Optional[str] = None,
+                      semantic_scope: str = "", parse: Optional[Callable[[str], Any]] = None, **kwargs):
+        hit, vector = await lookup_cached(prompt, namespace, semantic_key, semantic_scope)
+        if hit is not None:
+            return hit
+
+        response = await func(prompt, *args, **kwargs)
+        if parse is not None:
+            response = parse(response)
+        store_cached(prompt, namespace, response, vector, semantic_scope)
+        return response
+    return wrapper
+
+
 def extract_text_from_pdf(path: str) -> str:
     """Extract text from PDF file"""
     try:
-        reader = PdfReader(path)
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        print(f"Error reading PDF: {e}")
+        return ""
+    return extract_text_from_pdf_bytes(data)
+
+def extract_text_from_pdf_bytes(data: bytes, executor: Optional[Executor] = None) -> str:
+    """Extract text from an in-memory PDF.
+
+    With PyMuPDF and a process pool executor, PDFs of PARALLEL_PDF_MIN_PAGES or
+    more pages are split into one page range per worker and extracted in parallel.
+    If a worker fails, the text is extracted in-process instead; a broken pool
+    raises BrokenProcessPool so the caller can replace it.
+    """
+    try:
+        if pymupdf is not None:
+            with pymupdf.open(stream=data, filetype="pdf") as doc:
+                page_count = doc.page_count
+                if executor is None or page_count < PARALLEL_PDF_MIN_PAGES:
+                    return "\n".join(page.get_text("text") for page in doc)
+            step = -(-page_count // PDF_WORKERS)  # ceil division
+            try:
+                futures = [
+                    executor.submit(pdf_pages.extract_page_range, data, start, min(start + step, page_count))
+                    for start in range(0, page_count, step)
+                ]
+                return "\n".join(f.result() for f in futures)
+            except BrokenProcessPool:
+                raise
+            except Exception as e:
+                print(f"Parallel PDF extraction failed ({e}), extracting in-process...")
+                return extract_text_from_pdf_bytes(data)
+        reader = PdfReader(io.BytesIO(data))
         text = []
         for p in reader.pages:
             page_text = p.extract_text() or ""
             text.append(page_text)
         return "\n".join(text)
+    except BrokenProcessPool:
+        raise
     except Exception as e:
         print(f"Error reading PDF: {e}")
         return ""
 
-def call_llm(prompt: str) -> str:
+def _generation_config(schema=None):
+    """Sampling config; passing a response schema switches Gemini to JSON output"""
+    if schema is None:
+        return genai.types.GenerationConfig(
+            temperature=0.7,
+            max_output_tokens=2000
+        )
+    # Structured calls: low temperature and schema-constrained JSON, so responses
+    # come back without markdown fences and rarely need repair
+    return genai.types.GenerationConfig(
+        temperature=0.1,
+        max_output_tokens=2000,
+        response_mime_type="application/json",
+        response_schema=schema
+    )
+
+
+@cached_llm
+async def call_llm(prompt: str, schema=None) -> str:
     """Call Google Gemini API with real data - NO MOCK"""
     try:
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                max_output_tokens=2000
+        async with _llm_slots:
+            response = await model.generate_content_async(
+                prompt,
+                generation_config=_generation_config(schema)
             )
-        )
         
         # Check if response has content
         if not response.parts or len(response.parts) == 0:
@@ -77,73 +321,80 @@ def call_llm(prompt: str) -> str:
         raise RuntimeError(error_msg)
 
 
-def extract_json_from_markdown(text: str) -> str:
-    """Extract JSON from markdown code blocks if wrapped"""
-    text = text.strip()
-    
-    # Remove markdown code block wrappers if present
-    if text.startswith("```json"):
-        text = text[7:]  # Remove ```json
-    elif text.startswith("```"):
-        text = text[3:]  # Remove ```
-    
-    if text.endswith("```"):
-        text = text[:-3]  # Remove trailing ```
-    
-    return text.strip()
+async def call_llm_stream(prompt: str, schema=None) -> AsyncIterator[str]:
+    """Stream Google Gemini response text chunk by chunk.
 
+    Raises RuntimeError as soon as a chunk comes back blocked, so callers can
+    stop early instead of waiting for the full response.
+    """
+    try:
+        async with _llm_slots:
+            response = await model.generate_content_async(
+                prompt,
+                generation_config=_generation_config(schema),
+                stream=True
+            )
+            received = False
+            async for chunk in response:
+                try:
+                    text = chunk.text
+                except (AttributeError, ValueError) as e:
+                    # No valid parts in this chunk - blocked mid-stream
+                    finish_reason = getattr(chunk, 'finish_reason', 'unknown')
+                    error_msg = f"Gemini API blocked response (finish_reason: {finish_reason}): {e}"
+                    print(f"{error_msg}")
+                    raise RuntimeError(error_msg)
+                if text:
+                    received = True
+                    yield text
+        if not received:
+            error_msg = "Empty response text from Gemini"
+            print(f"{error_msg}")
+            raise RuntimeError(error_msg)
+    except RuntimeError:
+        raise  # Re-raise RuntimeError as-is
+    except Exception as e:
+        error_msg = f"Google Gemini API error: {str(e)}"
+        print(f"{error_msg}")
+        raise RuntimeError(error_msg)
 
-def repair_json_string(text: str) -> str:
-    """Attempt to repair common JSON issues"""
-    # Remove any leading/trailing whitespace
-    text = text.strip()
-    
-    # If it starts with [ or {, try to parse as-is first
-    if not (text.startswith('{') or text.startswith('[')):
-        # Try to find first { or [
-        brace_idx = text.find('{')
-        bracket_idx = text.find('[')
-        
-        start_idx = -1
-        if brace_idx != -1 and bracket_idx != -1:
-            start_idx = min(brace_idx, bracket_idx)
-        elif brace_idx != -1:
-            start_idx = brace_idx
-        elif bracket_idx != -1:
-            start_idx = bracket_idx
-        
-        if start_idx != -1:
-            text = text[start_idx:]
-    
-    # Try to find the end of JSON (last } or ])
-    last_brace = text.rfind('}')
-    last_bracket = text.rfind(']')
-    
-    end_idx = -1
-    if last_brace != -1 and last_bracket != -1:
-        end_idx = max(last_brace, last_bracket) + 1
-    elif last_brace != -1:
-        end_idx = last_brace + 1
-    elif last_bracket != -1:
-        end_idx = last_bracket + 1
-    
-    if end_idx != -1:
-        text = text[:end_idx]
-    
-    return text
 
+# First JSON opening bracket through the last closing bracket. Greedy and
+# DOTALL, so markdown fences and any chatter around the payload are skipped in
+# one C-level scan.
+_JSON_RE = re.compile(r"[\[{].*[\]}]", re.S)
 
 
+def extract_json(text: str) -> str:
+    """Return the JSON body of an LLM response (fences and surrounding text stripped)"""
+    m = _JSON_RE.search(text)
+    return m.group() if m else text.strip()
 
-def analyze_resume_with_llm(resume_text: str, job_description: str) -> Dict:
-    """Analyze resume and score against job description"""
-    # First attempt with detailed prompt
-    prompt = f"""You are an expert HR AI. Extract structured fields from the resume and score the candidate against the job description.
 
-JOB_DESC:\n{job_description}\n
-RESUME:\n{resume_text}\n
-Return ONLY a valid JSON object (no markdown, no extra text, no code blocks) with these exact keys:
-- name: candidate's name (string)
+# Input caps for prompts: prefill cost grows with input length, and anything past
+# these sizes adds latency without improving the analysis (~4 chars per token)
+MAX_RESUME_CHARS = 8000
+MAX_JOB_DESC_CHARS = 4000
+MAX_ANSWER_CHARS = 3000
+
+
+def truncate_text(text: str, max_chars: int, label: str = "text") -> str:
+    """Cap text at max_chars, keeping the head and the tail.
+
+    For resumes the head usually holds contact details and recent experience
+    and the tail holds education/skills, so the middle is what gets dropped.
+    """
+    if len(text) <= max_chars:
+        return text
+    head = max_chars * 3 // 4
+    tail = max_chars - head
+    print(f"Truncated {label} from {len(text)} to {max_chars} chars")
+    return f"{text[:head]}\n...\n{text[-tail:]}"
+
+
+# Prompt templates, built once at import and filled with str.format per call
+# (literal JSON braces are doubled)
+_ANALYSIS_FIELDS = """- name: candidate's name (string)
 - skills: list of technical skills (array of strings)
 - experience: years and type of experience (string)
 - education: educational background (string)
@@ -155,154 +406,364 @@ Return ONLY a valid JSON object (no markdown, no extra text, no code blocks) wit
 - overallScore: overall score 0-100 (integer)
 - strengths: list of strengths (array of strings)
 - weaknesses: list of areas to improve (array of strings)
+"""
 
+ANALYZE_TMPL = """You are an expert HR AI. Extract structured fields from the resume and score the candidate against the job description.
+
+JOB_DESC:\n{job_description}\n
+RESUME:\n{resume_text}\n
+Return ONLY a valid JSON object (no markdown, no extra text, no code blocks) with these exact keys:
+""" + _ANALYSIS_FIELDS + """
 Return ONLY the raw JSON, nothing else. No markdown code blocks. Ensure all array fields are properly closed with brackets."""
-    
-    try:
-        raw = call_llm(prompt)
-    except RuntimeError as e:
-        # If safety filter triggered, use a simpler prompt
-        if "blocked" in str(e).lower() or "safety" in str(e).lower():
-            print("First prompt blocked by safety filter, trying simpler prompt...")
-            # Try with a more neutral, non-controversial prompt
-            simple_prompt = f"""Analyze this resume against the job description. Output pure JSON only.
 
-Job: {job_description[:500]}
-Resume: {resume_text[:500]}
+SIMPLE_ANALYZE_TMPL = """Analyze this resume against the job description. Output pure JSON only.
+
+Job: {job_description}
+Resume: {resume_text}
 
 Output JSON with: name, skills, experience, education, projects, skillMatch (0-100), experienceMatch (0-100), projectRelevance (0-100), educationMatch (0-100), overallScore (0-100), strengths, weaknesses"""
-            try:
-                raw = call_llm(simple_prompt)
-            except RuntimeError as e2:
-                print(f"Both prompts blocked: {e2}")
-                raise ValueError(f"Resume analysis blocked by safety filters. Please try a different resume or job description.")
-        else:
-            raise ValueError(f"Resume analysis failed: {str(e)}")
-    
-    try:
-        # Clean any markdown wrapping
-        cleaned = extract_json_from_markdown(raw)
-        
-        # Try to repair common JSON issues
-        cleaned = repair_json_string(cleaned)
-        
-        # Log the cleaned response for debugging
-        print(f"Response length: {len(cleaned)} chars")
-        
-        # Try to parse JSON - be more informative about failures
-        try:
-            obj = json.loads(cleaned)
-        except json.JSONDecodeError as parse_error:
-            print(f"JSON parse error: {parse_error}")
-            print(f"Raw response first 500 chars: {raw[:500]}")
-            print(f"Cleaned response first 500 chars: {cleaned[:500]}")
-            raise ValueError(f"Invalid JSON from API: {str(parse_error)}")
-        
-        print(f"Real resume analysis received for: {obj.get('name', 'Unknown')}")
-        return obj
-    except ValueError:
-        raise  # Re-raise ValueError as-is
-    except Exception as e:
-        print(f"Unexpected error during analysis: {e}")
-        raise ValueError(f"Resume analysis failed: {str(e)}")
 
-def generate_interview_questions(job_description: str, resume_analysis: Dict) -> List[str]:
-    """Generate tailored interview questions based on real resume and job description"""
-    prompt = f"""You are an expert HR interviewer. Generate exactly 4 technical interview questions tailored for this role.
+# Interview questions are generated together, in one JSON array per LLM call
+QUESTION_COUNT = 4
+
+FALLBACK_QUESTIONS = [
+    "What is your experience with the technical stack for this role?",
+    "Can you describe a challenging project you worked on and how you solved it?",
+    "How do you approach learning new technologies in your field?",
+    "What are your strengths and how would they contribute to this role?",
+]
+
+INTERVIEW_TMPL = """You are an expert HR interviewer. Generate exactly {count} technical interview questions tailored for this role.
 
 JOB DESCRIPTION:
-{job_description[:1000]}
+{job_description}
 
 CANDIDATE PROFILE:
-Skills: {', '.join(resume_analysis.get('skills', [])[:5])}
-Experience: {resume_analysis.get('experience', 'Not specified')}
+Skills: {skills}
+Experience: {experience}
+
+Generate {count} interview questions that test technical skills and problem-solving for this role.
+Return ONLY a JSON array of exactly {count} strings. No markdown, no code blocks, no extra text.
+Format: ["question1", "question2", ...]"""
+
+COMBINED_TMPL = """You are an expert HR AI and technical interviewer. Complete BOTH tasks below.
+
+JOB_DESC:\n{job_description}\n
+RESUME:\n{resume_text}\n
+TASK 1 - Extract structured fields from the resume and score the candidate against the job description, with these exact keys:
+""" + _ANALYSIS_FIELDS + """
+TASK 2 - Generate exactly {count} technical interview questions tailored for this role and candidate that test technical skills and problem-solving.
+
+Return ONLY a valid JSON object (no markdown, no extra text, no code blocks) of the form:
+{{"analysis": {{...TASK 1 keys...}}, "questions": ["question1", "question2", ...]}}
+
+Ensure all array fields are properly closed with brackets."""
+
+EVAL_TMPL = """Evaluate this interview answer objectively. Provide a score 0-100 and feedback.
+
+Question: {question}
+Answer: {answer}
+
+Return only valid JSON (no markdown):
+{{"score": 75, "feedback": "feedback text", "strengths": "strengths", "improvements": "improvements"}}"""
+
+EVAL_BATCH_ITEM_TMPL = "[{index}]\nQuestion: {question}\nAnswer: {answer}"
+
+EVAL_BATCH_TMPL = """Evaluate the following {count} interview answers objectively. Provide a score 0-100 and feedback for each.
+
+{items}
+
+Return only a valid JSON array (no markdown) of exactly {count} objects, one per answer, each with the answer's [index]:
+[{{"index": 1, "score": 75, "feedback": "feedback text", "strengths": "strengths", "improvements": "improvements"}}, ...]"""
+
+
+# Response schemas for Gemini structured output (response_schema)
+class AnalysisSchema(TypedDict):
+    name: str
+    skills: List[str]
+    experience: str
+    education: str
+    projects: List[str]
+    skillMatch: int
+    experienceMatch: int
+    projectRelevance: int
+    educationMatch: int
+    overallScore: int
+    strengths: List[str]
+    weaknesses: List[str]
+
+
+class EvaluationSchema(TypedDict):
+    score: int
+    feedback: str
+    strengths: str
+    improvements: str
+
+
+class BatchEvaluationSchema(EvaluationSchema):
+    index: int
+
+
+class CombinedSchema(TypedDict):
+    analysis: AnalysisSchema
+    questions: List[str]
+
+
+# Top-level arrays must use the builtin list[...]: the SDK's schema converter
+# only recognises classes and types.GenericAlias, not typing.List
+QuestionsSchema = list[str]
+BatchEvaluationsSchema = list[BatchEvaluationSchema]
+
+
+# Fields the app reads from each structured response; anything else the model
+# adds is dropped before the payload is cached or stored on a session
+ANALYSIS_KEYS = tuple(AnalysisSchema.__annotations__)
+EVAL_KEYS = tuple(EvaluationSchema.__annotations__)
+
+
+def select_keys(obj: Dict, keys: Tuple[str, ...]) -> Dict:
+    """Return only the known keys of a parsed response object"""
+    return {k: obj[k] for k in keys if k in obj}
+
+
+def parse_llm_json(text: str):
+    """Parse JSON from an LLM response with orjson.
+
+    Raises orjson.JSONDecodeError (a json.JSONDecodeError subclass) if the
+    extracted body is not valid JSON.
+    """
+    return orjson.loads(extract_json(text))
+
+
+def _parse_analysis(raw: str) -> Dict:
+    """Parse an analysis response; raises ValueError if it is not a JSON object"""
+    # Log the response size for debugging
+    print(f"Response length: {len(raw)} chars")
+    try:
+        obj = parse_llm_json(raw)
+    except json.JSONDecodeError as parse_error:
+        print(f"JSON parse error: {parse_error}")
+        print(f"Raw response first 500 chars: {raw[:500]}")
+        raise ValueError(f"Invalid JSON from API: {str(parse_error)}")
+    if not isinstance(obj, dict):
+        raise ValueError("Invalid JSON from API: expected an object")
+
+    print(f"Real resume analysis received for: {obj.get('name', 'Unknown')}")
+    return select_keys(obj, ANALYSIS_KEYS)
+
+
+async def analyze_resume_with_llm(resume_text: str, job_description: str) -> Dict:
+    """Analyze resume and score against job description"""
+    resume_text = truncate_text(resume_text, MAX_RESUME_CHARS, "resume")
+    job_description = truncate_text(job_description, MAX_JOB_DESC_CHARS, "job description")
+
+    # First attempt with detailed prompt
+    prompt = ANALYZE_TMPL.format(job_description=job_description, resume_text=resume_text)
+    
+    try:
+        return await call_llm(prompt, schema=AnalysisSchema, namespace="analyze",
+                              semantic_key=job_description, semantic_scope=resume_text, parse=_parse_analysis)
+    except RuntimeError as e:
+        # If safety filter triggered, use a simpler prompt
+        if not ("blocked" in str(e).lower() or "safety" in str(e).lower()):
+            raise ValueError(f"Resume analysis failed: {str(e)}")
+        print("First prompt blocked by safety filter, trying simpler prompt...")
+
+    # Try with a more neutral, non-controversial prompt
+    simple_prompt = SIMPLE_ANALYZE_TMPL.format(job_description=job_description[:500], resume_text=resume_text[:500])
+    try:
+        return await call_llm(simple_prompt, schema=AnalysisSchema, namespace="analyze_simple", parse=_parse_analysis)
+    except RuntimeError as e2:
+        print(f"Both prompts blocked: {e2}")
+        raise ValueError(f"Resume analysis blocked by safety filters. Please try a different resume or job description.")
+
+def _parse_questions(raw: str, count: int) -> List[str]:
+    """Parse a questions response; raises ValueError (JSONDecodeError if not JSON)"""
+    out = parse_llm_json(raw)
+    if not isinstance(out, list) or len(out) < count:
+        raise ValueError(f"Expected array of {count}+ questions, got: {raw[:100]}")
+    print(f"Real interview questions generated: {len(out)} questions")
+    return out[:count]
 
-Generate 4 interview questions that test technical skills and problem-solving for this role.
-Return ONLY a JSON array of exactly 4 strings. No markdown, no code blocks, no extra text.
-Format: ["question1", "question2", "question3", "question4"]"""
+
+async def generate_interview_questions(job_description: str, resume_analysis: Dict, count: int = QUESTION_COUNT) -> List[str]:
+    """Generate `count` tailored interview questions in a single LLM call"""
+    prompt = INTERVIEW_TMPL.format(
+        count=count,
+        job_description=job_description[:1000],
+        skills=', '.join(resume_analysis.get('skills', [])[:5]),
+        experience=resume_analysis.get('experience', 'Not specified'),
+    )
     
     try:
-        raw = call_llm(prompt)
+        return await call_llm(prompt, schema=QuestionsSchema, namespace="questions", parse=lambda raw: _parse_questions(raw, count))
     except RuntimeError as e:
         if "blocked" in str(e).lower():
             # Use simpler, neutral questions as fallback
             print("Interview questions prompt blocked, using standard questions...")
-            return [
-                "What is your experience with the technical stack for this role?",
-                "Can you describe a challenging project you worked on and how you solved it?",
-                "How do you approach learning new technologies in your field?",
-                "What are your strengths and how would they contribute to this role?"
-            ]
+            return FALLBACK_QUESTIONS[:count]
         else:
             raise ValueError(f"Failed to generate interview questions: {e}")
-    
-    try:
-        # Clean any markdown wrapping
-        cleaned = extract_json_from_markdown(raw)
-        
-        # Try to repair common JSON issues
-        cleaned = repair_json_string(cleaned)
-        
-        out = json.loads(cleaned)
-        if isinstance(out, list) and len(out) >= 4:
-            print(f"Real interview questions generated: {len(out)} questions")
-            return out[:4]
-        else:
-            raise ValueError(f"Expected array of 4+ questions, got: {raw[:100]}")
     except json.JSONDecodeError:
         print("Failed to parse questions JSON, using standard questions...")
-        return [
-            "What is your experience with the technical stack for this role?",
-            "Can you describe a challenging project you worked on and how you solved it?",
-            "How do you approach learning new technologies in your field?",
-            "What are your strengths and how would they contribute to this role?"
-        ]
+        return FALLBACK_QUESTIONS[:count]
     except Exception as e:
         print(f"Error generating interview questions: {e}")
         raise ValueError(f"Failed to generate interview questions: {e}")
 
-def evaluate_answer(question: str, answer: str) -> Dict:
-    """Evaluate interview answer with detailed scoring and feedback"""
-    prompt = f"""Evaluate this interview answer objectively. Provide a score 0-100 and feedback.
+def build_combined_prompt(resume_text: str, job_description: str, count: int = QUESTION_COUNT) -> str:
+    """Prompt asking for the resume analysis and interview questions in one JSON envelope"""
+    resume_text = truncate_text(resume_text, MAX_RESUME_CHARS, "resume")
+    job_description = truncate_text(job_description, MAX_JOB_DESC_CHARS, "job description")
+    return COMBINED_TMPL.format(job_description=job_description, resume_text=resume_text, count=count)
 
-Question: {question}
-Answer: {answer}
 
-Return only valid JSON (no markdown):
-{{"score": 75, "feedback": "feedback text", "strengths": "strengths", "improvements": "improvements"}}"""
+def parse_combined_response(raw: str, count: int = QUESTION_COUNT) -> Dict:
+    """Split a combined response into {"analysis": {...}, "questions": [...]}; raises ValueError"""
+    obj = parse_llm_json(raw)
+    analysis = obj.get("analysis") if isinstance(obj, dict) else None
+    questions = obj.get("questions") if isinstance(obj, dict) else None
+    if not isinstance(analysis, dict) or not isinstance(questions, list) or len(questions) < count:
+        raise ValueError("Combined response missing analysis or questions")
+    print(f"Real combined analysis received for: {analysis.get('name', 'Unknown')}")
+    return {"analysis": select_keys(analysis, ANALYSIS_KEYS), "questions": questions[:count]}
+
+
+COMBINED_NAMESPACE = "analyze_and_generate"
+
+
+async def lookup_combined(prompt: str, resume_text: str, job_description: str):
+    """lookup_cached for a build_combined_prompt prompt, keyed as analyze_and_generate caches it"""
+    return await lookup_cached(prompt, COMBINED_NAMESPACE, semantic_key=job_description, semantic_scope=resume_text)
+
+
+def store_combined(prompt: str, resume_text: str, result: Dict, vector=None) -> None:
+    """Cache a parsed combined result (e.g. from a streamed response) for analyze_and_generate"""
+    store_cached(prompt, COMBINED_NAMESPACE, result, vector, semantic_scope=resume_text)
+
+
+async def analyze_and_generate(resume_text: str, job_description: str, count: int = QUESTION_COUNT) -> Dict:
+    """Analyze resume and generate interview questions in a single Gemini call.
+
+    Returns {"analysis": {...}, "questions": [...]}. Falls back to the separate
+    analyze_resume_with_llm + generate_interview_questions calls if the combined
+    response is blocked or cannot be parsed.
+    """
+    prompt = build_combined_prompt(resume_text, job_description, count)
+    try:
+        return await call_llm(prompt, schema=CombinedSchema, namespace=COMBINED_NAMESPACE,
+                              semantic_key=job_description, semantic_scope=resume_text,
+                              parse=lambda raw: parse_combined_response(raw, count))
+    except (RuntimeError, ValueError) as e:
+        # json.JSONDecodeError is a ValueError subclass
+        print(f"Combined analysis failed ({e}), falling back to separate calls...")
+
+    analysis = await analyze_resume_with_llm(resume_text, job_description)
+    questions = await generate_interview_questions(job_description, analysis, count)
+    return {"analysis": analysis, "questions": questions}
+
+def build_evaluation_prompt(question: str, answer: str) -> str:
+    answer = truncate_text(answer, MAX_ANSWER_CHARS, "answer")
+    return EVAL_TMPL.format(question=question, answer=answer)
+
+
+# Stand-in evaluations for responses that are blocked or cannot be parsed
+FALLBACK_EVALUATION = {
+    "score": 70,
+    "feedback": "Answer accepted",
+    "strengths": "Provided response",
+    "improvements": "More detail would help"
+}
+
+BLOCKED_EVALUATION = {
+    "score": 70,
+    "feedback": "Answer accepted. See strengths and improvements.",
+    "strengths": "Candidate provided a substantive response",
+    "improvements": "Consider more specific examples"
+}
+
+
+def is_fallback(result) -> bool:
+    """True if result is, or includes, one of the canned stand-ins above or
+    FALLBACK_QUESTIONS rather than a model response (callers should not cache it)"""
+    if isinstance(result, dict) and "questions" in result:
+        return is_fallback(result["questions"])
+    if isinstance(result, list):
+        return bool(result) and result == FALLBACK_QUESTIONS[:len(result)]
+    return result == FALLBACK_EVALUATION or result == BLOCKED_EVALUATION
+
+
+def _parse_evaluation_strict(raw: str) -> Dict:
+    """Parse an evaluation response; raises ValueError or TypeError if it is malformed"""
+    out = parse_llm_json(raw)
+    if not isinstance(out, dict) or 'score' not in out or 'feedback' not in out:
+        raise ValueError("Missing required fields in response")
+    out['score'] = max(0, min(100, int(out['score'])))
+    print(f"Real answer evaluated - Score: {out['score']}")
+    return select_keys(out, EVAL_KEYS)
+
+
+def parse_evaluation(raw: str) -> Dict:
+    """Parse an evaluation response, using a default score if it is malformed"""
+    try:
+        return _parse_evaluation_strict(raw)
+    except (ValueError, TypeError):
+        print("Failed to parse evaluation JSON, using default score...")
+        return dict(FALLBACK_EVALUATION)
+
+
+async def evaluate_answer(question: str, answer: str) -> Dict:
+    """Evaluate interview answer with detailed scoring and feedback"""
+    prompt = build_evaluation_prompt(question, answer)
     
     try:
-        raw = call_llm(prompt)
+        return await call_llm(prompt, schema=EvaluationSchema, namespace="evaluate", parse=_parse_evaluation_strict)
     except RuntimeError as e:
         if "blocked" in str(e).lower():
             print("Answer evaluation blocked, using default score...")
-            return {
-                "score": 70,
-                "feedback": "Answer accepted. See strengths and improvements.",
-                "strengths": "Candidate provided a substantive response",
-                "improvements": "Consider more specific examples"
-            }
+            return dict(BLOCKED_EVALUATION)
         else:
             raise ValueError(f"Failed to evaluate interview answer: {e}")
-    
-    try:
-        # Clean any markdown wrapping
-        cleaned = extract_json_from_markdown(raw)
-        out = json.loads(cleaned)
-        if 'score' in out and 'feedback' in out:
-            out['score'] = max(0, min(100, int(out['score'])))
-            print(f"Real answer evaluated - Score: {out['score']}")
-            return out
-        else:
-            raise ValueError(f"Missing required fields in response")
-    except (json.JSONDecodeError, ValueError):
+    except (ValueError, TypeError):
         print("Failed to parse evaluation JSON, using default score...")
-        return {
-            "score": 70,
-            "feedback": "Answer accepted",
-            "strengths": "Provided response",
-            "improvements": "More detail would help"
-        }
-    except Exception as e:
-        print(f"Error evaluating answer: {e}")
-        raise ValueError(f"Failed to evaluate interview answer: {e}")
+        return dict(FALLBACK_EVALUATION)
+
+
+def _parse_evaluation_batch(raw: str, count: int) -> List[Dict]:
+    """Parse a batched evaluation response; raises ValueError or TypeError if it is malformed"""
+    out = parse_llm_json(raw)
+    if not isinstance(out, list) or len(out) != count:
+        raise ValueError(f"Expected array of {count} evaluations")
+    # Match evaluations to answers by their echoed index, never by position
+    by_index = {item.get('index'): item for item in out if isinstance(item, dict)}
+    if sorted(by_index) != list(range(1, count + 1)):
+        raise ValueError("Evaluation indices do not match the answers")
+    out = [by_index[i] for i in range(1, count + 1)]
+    for item in out:
+        if not isinstance(item, dict) or 'score' not in item or 'feedback' not in item:
+            raise ValueError("Missing required fields in response")
+        item['score'] = max(0, min(100, int(item['score'])))
+    print(f"Real answers evaluated in batch of {len(out)}")
+    return [select_keys(item, EVAL_KEYS) for item in out]
+
+
+async def evaluate_answers_batch(pairs: List[Tuple[str, str]]) -> List[Dict]:
+    """Evaluate several (question, answer) pairs with a single Gemini call"""
+    items = "\n\n".join(
+        EVAL_BATCH_ITEM_TMPL.format(index=i + 1, question=question, answer=truncate_text(answer, MAX_ANSWER_CHARS, 'answer'))
+        for i, (question, answer) in enumerate(pairs)
+    )
+    prompt = EVAL_BATCH_TMPL.format(count=len(pairs), items=items)
+
+    try:
+        return await call_llm(prompt, schema=BatchEvaluationsSchema, namespace="evaluate_batch",
+                              parse=lambda raw: _parse_evaluation_batch(raw, len(pairs)))
+    except RuntimeError as e:
+        if "blocked" in str(e).lower():
+            # One flagged answer blocks the whole batch - evaluate individually
+            print("Batched evaluation blocked, evaluating answers individually...")
+            return list(await asyncio.gather(*(evaluate_answer(q, a) for q, a in pairs)))
+        raise ValueError(f"Failed to evaluate interview answers: {e}")
+    except (ValueError, TypeError) as e:
+        print(f"Failed to parse batched evaluation JSON ({e}), evaluating answers individually...")
+        return list(await asyncio.gather(*(evaluate_answer(q, a) for q, a in pairs)))
@@ -1,18 +1,32 @@
 # backend/main.py
 import os
 import uuid
-import json
+import hashlib
 import asyncio
+import multiprocessing
+import statistics
+from collections import Counter
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from fastapi.responses import FileResponse, HTMLResponse, ORJSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ConfigDict, ValidationError
+from anyio import to_thread as anyio_to_thread
 
 import aiofiles  # async file operations
+import orjson
+import redis.asyncio as aioredis
+from redis.exceptions import WatchError
+from cachetools import LRUCache, TTLCache
 
 # Optional relative import for ai_engine
 try:
@@ -28,9 +42,51 @@ load_dotenv()
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 8000) or 8000)
+# Set to false when a CDN / reverse proxy serves the frontend build
+SERVE_STATIC = os.getenv("SERVE_STATIC", "true").lower() == "true"
+
+# Worker threads for blocking work (PDF parsing, embeddings, file I/O).
+# Threads are created lazily, so a generous cap costs nothing when idle.
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "200"))
+
+
+def _new_pdf_pool() -> ProcessPoolExecutor:
+    # spawn, not fork: forking a process that already holds gRPC state is unsafe
+    return ProcessPoolExecutor(
+        max_workers=engine.PDF_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # asyncio.to_thread uses the loop's default executor; Starlette's sync
+    # endpoints and file responses go through anyio's limiter (40 by default)
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=THREADPOOL_SIZE, thread_name_prefix="aura")
+    )
+    anyio_to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    app.state.pdf_pool = _new_pdf_pool()
+    app.state.gc_task = asyncio.create_task(_gc_loop())
+    # Open the Gemini channel (DNS, TLS, auth) before the first user request
+    try:
+        await asyncio.wait_for(engine.call_llm("ping", namespace="warmup"), timeout=10)
+    except Exception as exc:
+        print(f"Gemini warmup failed: {exc}")
+
+    yield
+
+    app.state.gc_task.cancel()
+    app.state.pdf_pool.shutdown(wait=False, cancel_futures=True)
+    await sessions.close()
+
 
 # App
-app = FastAPI(title="AURA Backend - AI Unified Resume & Interview Agent")
+app = FastAPI(
+    title="AURA Backend - AI Unified Resume & Interview Agent",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 # CORS — in production set explicit origins instead of "*"
 if ENVIRONMENT == "production":
@@ -46,6 +102,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """GZip responses, except the SSE endpoints (gzip would buffer their events)"""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith("/stream"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+app.add_middleware(StreamAwareGZipMiddleware, minimum_size=512)
+
 # Storage paths
 BASE_DIR = Path(__file__).parent
 STORAGE = (BASE_DIR / "data").resolve()
@@ -60,12 +129,241 @@ STATIC_DIR.mkdir(parents=True, exist_ok=True)
 # Templates for serving index.html
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
-# In-memory session store (ephemeral)
-sessions: Dict[str, Dict[str, Any]] = {}
+# Session store: Redis when REDIS_URL is set (shared across workers, survives
+# restarts), otherwise an in-process dict (single worker only)
+REDIS_URL = os.getenv("REDIS_URL")
+SESSION_TTL = 3600  # seconds
+
+
+# Persisted PDFs are stored by content hash and may be shared by several
+# sessions; count the sessions referencing each path
+_upload_refs: Counter = Counter()
+
+
+def _remove_upload(session: Dict[str, Any]) -> None:
+    """Release a session's persisted PDF, removing it once no session references it"""
+    path = session.get("file_path")
+    if not path:
+        return
+    _upload_refs[path] -= 1
+    if _upload_refs[path] > 0:
+        return
+    del _upload_refs[path]
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class SessionCache(TTLCache):
+    """TTLCache that removes a session's persisted PDF when it expires or is evicted"""
+
+    def expire(self, time=None):
+        # TTLCache.expire() returns the expired pairs since cachetools 5.5.0
+        expired = super().expire(time)
+        for _, session in expired:
+            _remove_upload(session)
+        return expired
+
+    def popitem(self):
+        key, session = super().popitem()
+        _remove_upload(session)
+        return key, session
+
+
+class MemorySessionStore:
+    """In-process session store (ephemeral), bounded by size and TTL"""
+
+    def __init__(self, maxsize: int = 1000, ttl: int = SESSION_TTL):
+        self._data: SessionCache = SessionCache(maxsize=maxsize, ttl=ttl)
+        # TTLCache is not safe for concurrent use; serialize access
+        self._lock = asyncio.Lock()
+
+    async def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        async with self._lock:
+            return self._data.get(sid)
+
+    async def save(self, sid: str, session: Dict[str, Any]) -> None:
+        async with self._lock:
+            self._data[sid] = session
+
+    async def update(self, sid: str, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Apply fn to the stored session and save it; returns fn's result, KeyError if gone"""
+        async with self._lock:
+            session = self._data.get(sid)
+            if session is None:
+                raise KeyError(sid)
+            result = fn(session)
+            self._data[sid] = session
+            return result
+
+    async def delete(self, sid: str) -> None:
+        async with self._lock:
+            self._data.pop(sid, None)
+
+    async def expire(self) -> None:
+        async with self._lock:
+            self._data.expire()
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisSessionStore:
+    """Redis session store; each write refreshes the session's TTL"""
+
+    def __init__(self, url: str, ttl: int = SESSION_TTL, max_connections: int = 100):
+        # One pooled client per process; connections are reused across requests
+        self._redis = aioredis.from_url(url, max_connections=max_connections, health_check_interval=30)
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(sid: str) -> str:
+        return f"aura:sess:{sid}"
+
+    async def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        raw = await self._redis.get(self._key(sid))
+        return orjson.loads(raw) if raw else None
+
+    async def save(self, sid: str, session: Dict[str, Any]) -> None:
+        await self._redis.setex(self._key(sid), self.ttl, orjson.dumps(session))
+
+    async def update(self, sid: str, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Apply fn to the stored session in a WATCH/MULTI transaction, retrying on
+        conflict, so concurrent writers never drop each other's changes; returns
+        fn's result, KeyError if the session is gone"""
+        key = self._key(sid)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    raw = await pipe.get(key)
+                    if not raw:
+                        raise KeyError(sid)
+                    session = orjson.loads(raw)
+                    result = fn(session)
+                    pipe.multi()
+                    pipe.setex(key, self.ttl, orjson.dumps(session))
+                    await pipe.execute()
+                    return result
+                except WatchError:
+                    continue
+
+    async def delete(self, sid: str) -> None:
+        await self._redis.delete(self._key(sid))
+
+    async def expire(self) -> None:
+        pass  # Redis evicts expired keys itself
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+sessions = RedisSessionStore(REDIS_URL) if REDIS_URL else MemorySessionStore()
+
+
+GC_INTERVAL = 60  # seconds
+
+
+async def _gc_loop():
+    """Periodically drop expired sessions (and their PDFs), plus PDFs left by earlier runs"""
+    while True:
+        await asyncio.sleep(GC_INTERVAL)
+        try:
+            await sessions.expire()
+            for path in STORAGE.glob("resume_*.pdf"):
+                if str(path) not in _upload_refs:
+                    path.unlink(missing_ok=True)
+        except Exception as exc:
+            print(f"Session cleanup failed: {exc}")
+
+
+async def _load_session(sid: Optional[str]) -> Dict[str, Any]:
+    session = await sessions.get(sid) if sid else None
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+async def _update_session(sid: str, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+    """Read-modify-write the stored session atomically. Handlers apply their changes
+    through this after any slow await, never by saving a session loaded earlier."""
+    try:
+        return await sessions.update(sid, fn)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+# Exact-match result caches keyed by a blake2b digest of the inputs. They sit in
+# front of the engine's prompt cache, so repeats (frontend retries, demo runs)
+# also skip prompt building and parsing. Canned fallbacks
+# (blocked or unparseable responses) are never stored, so they get retried.
+_analysis_cache: LRUCache = LRUCache(maxsize=512)
+_questions_cache: LRUCache = LRUCache(maxsize=512)
+_evaluation_cache: LRUCache = LRUCache(maxsize=512)
+
+
+def _cache_key(*parts: str) -> str:
+    return hashlib.blake2b("\0".join(parts).encode(), digest_size=16).hexdigest()
+
+
+# Paraphrased job descriptions are matched by the engine's semantic cache
+# (same resume, similar JD), which sits behind this exact cache
+async def _analyze(resume_text: str, job_description: str) -> Dict[str, Any]:
+    key = _cache_key(resume_text, job_description)
+    result = _analysis_cache.get(key)
+    if result is None:
+        result = await engine.analyze_and_generate(resume_text, job_description)
+        if not engine.is_fallback(result):
+            _analysis_cache[key] = result
+    return result
+
+
+async def _generate_questions(job_description: str, analysis: Dict[str, Any]) -> list:
+    key = _cache_key(job_description, orjson.dumps(analysis, option=orjson.OPT_SORT_KEYS).decode())
+    questions = _questions_cache.get(key)
+    if questions is None:
+        questions = await engine.generate_interview_questions(job_description, analysis)
+        if not engine.is_fallback(questions):
+            _questions_cache[key] = questions
+    return questions
+
+
+async def _evaluate(question: str, answer: str) -> Dict[str, Any]:
+    key = _cache_key(question, answer)
+    evaluation = _evaluation_cache.get(key)
+    if evaluation is None:
+        evaluation = await engine.evaluate_answer(question, answer)
+        if not engine.is_fallback(evaluation):
+            _evaluation_cache[key] = evaluation
+    return evaluation
+
+
+async def _evaluate_all(pairs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """Evaluate a whole interview, sending every uncached answer in one LLM call"""
+    keys = [_cache_key(question, answer) for question, answer in pairs]
+    evaluations = [_evaluation_cache.get(key) for key in keys]
+    missing = [i for i, evaluation in enumerate(evaluations) if evaluation is None]
+    if len(missing) == 1:
+        evaluations[missing[0]] = await engine.evaluate_answer(*pairs[missing[0]])
+    elif missing:
+        results = await engine.evaluate_answers_batch([pairs[i] for i in missing])
+        for i, evaluation in zip(missing, results):
+            evaluations[i] = evaluation
+    for i in missing:
+        if not engine.is_fallback(evaluations[i]):
+            _evaluation_cache[keys[i]] = evaluations[i]
+    return evaluations
 
 # Small upload guards
 ALLOWED_CONTENT_TYPES = {"application/pdf"}
 MAX_UPLOAD_BYTES = 8 * 1024 * 1024  # 8 MB (adjust as needed)
+# Large reads: each UploadFile.read on a disk-spooled upload is a threadpool hop
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Extracted resume text keyed by blake2b digest of the uploaded bytes
+_pdf_text_cache: LRUCache = LRUCache(maxsize=256)
+
+# Keep uploaded PDFs in backend/data (off by default; text is extracted in memory)
+PERSIST_UPLOADS = os.getenv("PERSIST_UPLOADS", "false").lower() == "true"
 
 
 # Utility: run sync function in threadpool
@@ -109,138 +407,275 @@ async def health():
 @app.post("/upload")
 async def upload_resume(file: UploadFile = File(...)):
     """
-    Upload resume (expects PDF). Saves to backend/data and extracts text via ai_engine.
+    Upload resume (expects PDF). Extracts text in memory via ai_engine; the PDF is
+    only written to backend/data when PERSIST_UPLOADS is enabled.
     """
     # Basic content-type check
     if file.content_type not in ALLOWED_CONTENT_TYPES:
         raise HTTPException(status_code=400, detail="Only PDF files are allowed.")
 
-    # Read stream incrementally and limit size
     session_id = str(uuid.uuid4())
-    safe_name = f"resume_{session_id}.pdf"
-    out_path = STORAGE / safe_name
 
-    # write file asynchronously and enforce MAX_UPLOAD_BYTES
-    total = 0
+    # Read stream incrementally, enforce MAX_UPLOAD_BYTES and hash as we go
+    data = bytearray()
+    hasher = hashlib.blake2b(digest_size=16)
     try:
-        async with aiofiles.open(out_path, "wb") as f:
-            while True:
-                chunk = await file.read(1024 * 64)
-                if not chunk:
-                    break
-                total += len(chunk)
-                if total > MAX_UPLOAD_BYTES:
-                    await f.close()
-                    try:
-                        out_path.unlink(missing_ok=True)
-                    except Exception:
-                        pass
-                    raise HTTPException(status_code=413, detail="File too large.")
-                await f.write(chunk)
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            if len(data) + len(chunk) > MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail="File too large.")
+            data += chunk
+            hasher.update(chunk)
     except HTTPException:
         raise
     except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Failed to save file: {exc}")
-
-    # Extract text using engine (potentially blocking) — run in threadpool
-    try:
-        resume_text = await run_blocking(engine.extract_text_from_pdf, str(out_path))
-    except Exception as exc:
-        # cleanup on failure
+        raise HTTPException(status_code=500, detail=f"Failed to read file: {exc}")
+    finally:
+        # Release the spooled temp file now rather than at request teardown
+        await file.close()
+
+    # Extract text using engine (potentially blocking) — run in threadpool.
+    # Re-uploads of the same PDF are served from the text cache.
+    digest = hasher.hexdigest()
+    resume_text = _pdf_text_cache.get(digest)
+    if resume_text is None:
+        pool = app.state.pdf_pool
+        try:
+            try:
+                resume_text = await run_blocking(engine.extract_text_from_pdf_bytes, data, pool)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed); replace the pool once and extract this PDF in-process
+                print("PDF worker pool is broken, restarting it")
+                if app.state.pdf_pool is pool:
+                    app.state.pdf_pool = _new_pdf_pool()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                resume_text = await run_blocking(engine.extract_text_from_pdf_bytes, data)
+        except Exception as exc:
+            raise HTTPException(status_code=500, detail=f"Failed to extract text: {exc}")
+        # Empty text may be a transient extraction failure, so don't pin it in the cache
+        if resume_text.strip():
+            _pdf_text_cache[digest] = resume_text
+
+    # Persist the original only once extraction has succeeded. Skipped with Redis:
+    # local disk is not shared between workers.
+    # Files are named by content hash, so identical uploads share one copy.
+    file_path = None
+    if PERSIST_UPLOADS and not REDIS_URL and resume_text.strip():
+        out_path = STORAGE / f"resume_{digest}.pdf"
+        # Take the reference first so the GC sweep never sees a half-written file as orphaned
+        _upload_refs[str(out_path)] += 1
         try:
-            out_path.unlink(missing_ok=True)
-        except Exception:
-            pass
-        raise HTTPException(status_code=500, detail=f"Failed to extract text: {exc}")
+            if not out_path.exists():
+                async with aiofiles.open(out_path, "wb") as f:
+                    await f.write(data)
+            file_path = str(out_path)
+        except Exception as exc:
+            _remove_upload({"file_path": str(out_path)})
+            print(f"Failed to persist upload: {exc}")
+
+    # Slice the preview before the full text goes into the session store, so the
+    # response only ever carries (and encodes) the 200-char prefix
+    preview = resume_text[:200]
 
     # Save session
-    sessions[session_id] = {
+    await sessions.save(session_id, {
         "resume_text": resume_text,
         "job_description": "",
         "analysis": None,
         "interview_questions": [],
         "interview_answers": [],
         "final_score": None,
-        "file_path": str(out_path),
-    }
+        "file_path": file_path,
+    })
 
-    return {"status": "success", "session_id": session_id, "preview": resume_text[:200]}
+    return {"status": "success", "session_id": session_id, "preview": preview}
 
 
-class AnalyzeRequestModel(dict):
-    pass  # kept simple — your Pydantic model can be used as earlier
+# Request bodies. Fields are optional so a missing session still maps to 404 and
+# missing inputs to 400, as the handlers report them; unknown keys are ignored.
+class SessionRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
 
+    session_id: Optional[str] = None
 
-@app.post("/analyze")
-async def analyze(payload: dict):
-    """
-    Analyze resume against job description.
-    Expects JSON { "session_id": "...", "job_description": "..." }
-    """
-    sid = payload.get("session_id")
-    job_description = payload.get("job_description", "")
 
-    if not sid or sid not in sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
+class AnalyzeRequest(SessionRequest):
+    job_description: str = ""
+
+
+class AnswerRequest(SessionRequest):
+    question_index: Optional[int] = None
+    answer: str = ""
+
+
+class InterviewRequest(SessionRequest):
+    answers: Optional[List[str]] = None
+
+
+async def _prepare_analysis(payload: AnalyzeRequest):
+    """Validate an analyze payload; returns (session_id, session, resume_text, job_description)"""
+    sid = payload.session_id
+    job_description = payload.job_description
+
+    session = await _load_session(sid)
     if not job_description or not job_description.strip():
         raise HTTPException(status_code=400, detail="Job description is required")
 
-    sessions[sid]["job_description"] = job_description
-    resume_text = sessions[sid].get("resume_text", "")
+    resume_text = session.get("resume_text", "")
 
     if not resume_text or not resume_text.strip():
         raise HTTPException(status_code=400, detail="Resume text is empty")
 
-    # Use engine.analyze_resume_with_llm in threadpool if blocking
+    return sid, session, resume_text, job_description
+
+
+def _apply_analysis(session: Dict[str, Any], job_description: str, result: Dict[str, Any]) -> None:
+    """Store an analysis result on the session, with the resume score used for the final score"""
+    session["job_description"] = job_description
+    session["analysis"] = result["analysis"]
+    session["interview_questions"] = result["questions"]
+    session["resume_score"] = result["analysis"].get("overallScore", 75)
+
+
+def _sse(data, event: str = None) -> bytes:
+    """Format one Server-Sent Event; data is JSON-encoded so newlines stay inside the frame.
+    Built as bytes so orjson's output is not decoded only to be re-encoded on send."""
+    frame = f"event: {event}\n".encode() if event else b""
+    return frame + b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+@app.post("/analyze")
+async def analyze(payload: AnalyzeRequest):
+    """
+    Analyze resume against job description.
+    Expects JSON { "session_id": "...", "job_description": "..." }
+    """
+    sid, session, resume_text, job_description = await _prepare_analysis(payload)
+
+    # Analysis and interview questions come back from a single LLM round-trip
     try:
-        analysis = await run_blocking(engine.analyze_resume_with_llm, resume_text, job_description)
-        sessions[sid]["analysis"] = analysis
-        return {"status": "success", "analysis": analysis}
+        result = await _analyze(resume_text, job_description)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Resume analysis failed: {exc}")
 
+    await _update_session(sid, lambda s: _apply_analysis(s, job_description, result))
+    return {"status": "success", "analysis": result["analysis"], "questions": result["questions"]}
+
+
+# Strong references to detached generation tasks (the loop only keeps weak ones)
+_background_tasks: set = set()
+
+
+@app.post("/analyze/stream")
+async def analyze_stream(payload: AnalyzeRequest):
+    """
+    Same as /analyze, streamed as Server-Sent Events.
+    Emits raw text chunks as they arrive, then a "done" event with
+    { "status", "analysis", "questions" } (or an "error" event).
+    Generation runs in its own task, so the session and caches are still
+    populated if the client disconnects mid-stream.
+    """
+    sid, session, resume_text, job_description = await _prepare_analysis(payload)
+    key = _cache_key(resume_text, job_description)
+    prompt = engine.build_combined_prompt(resume_text, job_description)
+
+    async def generate(queue: asyncio.Queue, vector):
+        try:
+            parts = []
+            try:
+                async for chunk in engine.call_llm_stream(prompt, schema=engine.CombinedSchema):
+                    parts.append(chunk)
+                    queue.put_nowait(_sse(chunk))
+                result = engine.parse_combined_response("".join(parts))
+                engine.store_combined(prompt, resume_text, result, vector)
+            except (RuntimeError, ValueError) as exc:
+                print(f"Streamed analysis failed ({exc}), falling back to separate calls...")
+                try:
+                    analysis = await engine.analyze_resume_with_llm(resume_text, job_description)
+                    questions = await engine.generate_interview_questions(job_description, analysis)
+                    result = {"analysis": analysis, "questions": questions}
+                except Exception as exc2:
+                    queue.put_nowait(_sse({"detail": f"Resume analysis failed: {exc2}"}, event="error"))
+                    return
+
+            if not engine.is_fallback(result):
+                _analysis_cache[key] = result
+            await _update_session(sid, lambda s: _apply_analysis(s, job_description, result))
+            queue.put_nowait(_sse({"status": "success", **result}, event="done"))
+        except HTTPException as exc:
+            queue.put_nowait(_sse({"detail": exc.detail}, event="error"))
+        finally:
+            queue.put_nowait(None)
+
+    async def events():
+        vector = None
+        result = _analysis_cache.get(key)
+        if result is None:
+            result, vector = await engine.lookup_combined(prompt, resume_text, job_description)
+        if result is not None:
+            try:
+                await _update_session(sid, lambda s: _apply_analysis(s, job_description, result))
+            except HTTPException as exc:
+                yield _sse({"detail": exc.detail}, event="error")
+                return
+            yield _sse({"status": "success", **result}, event="done")
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(generate(queue, vector))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+        while (frame := await queue.get()) is not None:
+            yield frame
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 
 @app.post("/start_interview")
-async def start_interview(payload: dict):
-    sid = payload.get("session_id")
-    if not sid or sid not in sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
+async def start_interview(payload: SessionRequest):
+    sid = payload.session_id
+    session = await _load_session(sid)
 
-    analysis = sessions[sid].get("analysis")
-    job_desc = sessions[sid].get("job_description", "")
+    analysis = session.get("analysis")
+    job_desc = session.get("job_description", "")
 
     if not analysis:
         raise HTTPException(status_code=400, detail="Must analyze resume first")
 
-    try:
-        questions = await run_blocking(engine.generate_interview_questions, job_desc, analysis)
-        sessions[sid]["interview_questions"] = questions
+    # Questions are normally generated alongside the analysis in /analyze
+    questions = session.get("interview_questions") or []
+    if questions:
         return {"status": "success", "questions": questions, "total": len(questions)}
+
+    try:
+        questions = await _generate_questions(job_desc, analysis)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
+    def store_questions(s: Dict[str, Any]) -> None:
+        s["interview_questions"] = questions
 
-@app.post("/submit_answer")
-async def submit_answer(payload: dict):
-    sid = payload.get("session_id")
-    q_idx = payload.get("question_index")
-    answer = payload.get("answer", "")
+    await _update_session(sid, store_questions)
+    return {"status": "success", "questions": questions, "total": len(questions)}
 
-    if not sid or sid not in sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
-    questions = sessions[sid].get("interview_questions", [])
+
+async def _prepare_answer(payload: AnswerRequest):
+    """Validate an answer payload; returns (session_id, session, question_index, question, answer)"""
+    sid = payload.session_id
+    q_idx = payload.question_index
+    answer = payload.answer
+
+    session = await _load_session(sid)
+    questions = session.get("interview_questions", [])
     if q_idx is None or q_idx < 0 or q_idx >= len(questions):
         raise HTTPException(status_code=400, detail="Invalid question index")
 
-    question = questions[q_idx]
+    return sid, session, q_idx, questions[q_idx], answer
 
-    # Evaluate answer via engine (offload to threadpool)
-    try:
-        evaluation = await run_blocking(engine.evaluate_answer, question, answer)
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Evaluation failed: {exc}")
 
-    sessions[sid]["interview_answers"].append({
+def _record_answer(session: Dict[str, Any], q_idx: int, question: str, answer: str, evaluation: Dict) -> Dict:
+    """Store an evaluated answer and, once every question is answered, the final score"""
+    questions = session.get("interview_questions", [])
+    session["interview_answers"].append({
         "question_index": q_idx,
         "question": question,
         "answer": answer,
@@ -248,12 +683,11 @@ async def submit_answer(payload: dict):
         "feedback": evaluation.get("feedback", ""),
     })
 
-    # If complete, compute final score
-    is_complete = len(sessions[sid]["interview_answers"]) == len(questions)
+    # If complete, compute final score (resume_score is stored at analysis time)
+    is_complete = len(session["interview_answers"]) == len(questions)
     if is_complete:
-        interview_scores = [a["score"] for a in sessions[sid]["interview_answers"]]
-        avg_interview_score = sum(interview_scores) / len(interview_scores) if interview_scores else 0
-        resume_score = sessions[sid]["analysis"].get("overallScore", 75) if sessions[sid]["analysis"] else 75
+        avg_interview_score = statistics.fmean(a["score"] for a in session["interview_answers"])
+        resume_score = session.get("resume_score", 75)
         final_score = (resume_score * 0.5 + avg_interview_score * 0.5)
 
         if avg_interview_score > 75 and resume_score > 80:
@@ -270,22 +704,133 @@ async def submit_answer(payload: dict):
             "recommendation": recommendation,
             "summary": f"Candidate demonstrates strong technical skills with relevant experience. Interview responses show {'excellent' if avg_interview_score > 75 else 'good'} problem-solving ability and communication skills."
         }
-        sessions[sid]["final_score"] = final_result
+        session["final_score"] = final_result
 
     return {
         "status": "success",
         "evaluation": evaluation,
         "question_index": q_idx,
         "is_complete": is_complete,
-        "final_score": sessions[sid].get("final_score")
+        "final_score": session.get("final_score")
     }
 
 
+@app.post(
+    "/submit_answer",
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": AnswerRequest.model_json_schema()}},
+    }},
+)
+async def submit_answer(request: Request):
+    # Hottest endpoint: validate the raw body in one pass with pydantic's JSON
+    # parser instead of decoding to a dict first
+    try:
+        payload = AnswerRequest.model_validate_json(await request.body())
+    except ValidationError as exc:
+        # Same error shape FastAPI produces for a declared body parameter
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in exc.errors(include_url=False)]
+        )
+    sid, session, q_idx, question, answer = await _prepare_answer(payload)
+
+    # Evaluate answer
+    try:
+        evaluation = await _evaluate(question, answer)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Evaluation failed: {exc}")
+
+    return await _update_session(sid, lambda s: _record_answer(s, q_idx, question, answer, evaluation))
+
+
+@app.post("/submit_all_answers")
+@app.post("/submit_interview")
+async def submit_all_answers(payload: InterviewRequest):
+    """
+    Submit every interview answer at once (also served as /submit_interview).
+    Expects JSON { "session_id": "...", "answers": ["answer to q0", "answer to q1", ...] }
+    """
+    sid = payload.session_id
+    answers = payload.answers
+
+    session = await _load_session(sid)
+    questions = session.get("interview_questions", [])
+    if not questions:
+        raise HTTPException(status_code=400, detail="Must start interview first")
+    if answers is None or len(answers) != len(questions):
+        raise HTTPException(status_code=400, detail=f"Expected {len(questions)} answers")
+
+    # Uncached answers are evaluated together in a single LLM call
+    try:
+        evaluations = await _evaluate_all(list(zip(questions, answers)))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Evaluation failed: {exc}")
+
+    def record_all(s: Dict[str, Any]) -> Dict:
+        # This submission replaces any answers recorded one at a time
+        s["interview_answers"] = []
+        s["final_score"] = None
+        for q_idx, (question, answer, evaluation) in enumerate(zip(questions, answers, evaluations)):
+            result = _record_answer(s, q_idx, question, answer, evaluation)
+        return result
+
+    result = await _update_session(sid, record_all)
+
+    return {
+        "status": "success",
+        "evaluations": evaluations,
+        "is_complete": result["is_complete"],
+        "final_score": result["final_score"],
+    }
+
+
+@app.post("/submit_answer/stream")
+async def submit_answer_stream(payload: AnswerRequest):
+    """
+    Same as /submit_answer, streamed as Server-Sent Events.
+    Emits raw feedback text chunks, then a "done" event with the /submit_answer body.
+    """
+    sid, session, q_idx, question, answer = await _prepare_answer(payload)
+    key = _cache_key(question, answer)
+    prompt = engine.build_evaluation_prompt(question, answer)
+
+    async def record(evaluation: Dict) -> bytes:
+        try:
+            result = await _update_session(sid, lambda s: _record_answer(s, q_idx, question, answer, evaluation))
+        except HTTPException as exc:
+            return _sse({"detail": exc.detail}, event="error")
+        return _sse(result, event="done")
+
+    async def events():
+        evaluation = _evaluation_cache.get(key)
+        if evaluation is not None:
+            yield await record(evaluation)
+            return
+
+        parts = []
+        try:
+            async for chunk in engine.call_llm_stream(prompt, schema=engine.EvaluationSchema):
+                parts.append(chunk)
+                yield _sse(chunk)
+            evaluation = engine.parse_evaluation("".join(parts))
+        except (RuntimeError, ValueError) as exc:
+            print(f"Streamed evaluation failed ({exc}), falling back to a regular evaluation...")
+            try:
+                evaluation = await engine.evaluate_answer(question, answer)
+            except Exception as exc2:
+                yield _sse({"detail": f"Evaluation failed: {exc2}"}, event="error")
+                return
+
+        if not engine.is_fallback(evaluation):
+            _evaluation_cache[key] = evaluation
+        yield await record(evaluation)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @app.get("/session/{session_id}")
 async def get_session(session_id: str):
-    if session_id not in sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
-    sess = sessions[session_id]
+    sess = await _load_session(session_id)
     return {
         "status": "success",
         "session_id": session_id,
@@ -297,27 +842,37 @@ async def get_session(session_id: str):
 
 @app.delete("/session/{session_id}")
 async def delete_session(session_id: str):
-    if session_id in sessions:
-        session = sessions.pop(session_id, None)
-        if session and session.get("file_path"):
-            try:
-                os.remove(session["file_path"])
-            except Exception:
-                pass
+    session = await sessions.get(session_id)
+    await sessions.delete(session_id)
+    if session:
+        _remove_upload(session)
     return {"status": "success", "message": "Session deleted"}
 
 
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with HTTP caching: Vite's content-hashed /assets/* never change,
+    so browsers and CDNs may keep them; everything else is revalidated"""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if self.get_path(scope).startswith("assets" + os.sep):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+
 # Mount frontend static assets directly at root (/) to serve everything as-is
 # This serves /assets/*, /vite.svg, etc. exactly as they appear in the static directory
 # MUST be mounted AFTER all API routes so API endpoints take precedence
-if STATIC_DIR.exists() and list(STATIC_DIR.iterdir()):
-    app.mount("/", StaticFiles(directory=str(STATIC_DIR), html=True), name="static")
+if SERVE_STATIC and STATIC_DIR.exists() and list(STATIC_DIR.iterdir()):
+    app.mount("/", CachedStaticFiles(directory=str(STATIC_DIR), html=True), name="static")
 
 # Optionally mount frontend/dist for local dev if not copied into backend/static
 frontend_dist = (BASE_DIR.parent / "frontend" / "dist").resolve()
-if frontend_dist.exists() and frontend_dist.is_dir() and not STATIC_DIR.exists():
+if SERVE_STATIC and frontend_dist.exists() and frontend_dist.is_dir() and not STATIC_DIR.exists():
     # serve development build under root if backend/static is empty
-    app.mount("/", StaticFiles(directory=str(frontend_dist), html=True), name="frontend-dist")
+    app.mount("/", CachedStaticFiles(directory=str(frontend_dist), html=True), name="frontend-dist")
 
 
 # If running as script
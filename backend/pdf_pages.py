@@ -0,0 +1,14 @@
+"""Page-range PDF text extraction for worker processes.
+
+Kept separate from ai_engine so that, under uvicorn, spawned workers only
+import PyMuPDF, not the Gemini client and embedding model. When the app is
+started with `python main.py`, spawn re-imports that __main__ module (and with
+it ai_engine) in every worker; use the uvicorn command to avoid that.
+"""
+import pymupdf
+
+
+def extract_page_range(data: bytes, start: int, stop: int) -> str:
+    """Extract text from pages [start, stop) of an in-memory PDF"""
+    with pymupdf.open(stream=data, filetype="pdf") as doc:
+        return "\n".join(doc[i].get_text("text") for i in range(start, stop))
@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+generation_types = pytest.importorskip("google.generativeai.types.generation_types")
+
+try:
+    from . import ai_engine as engine
+except ImportError:
+    import ai_engine as engine
+
+SCHEMAS = [
+    engine.AnalysisSchema,
+    engine.EvaluationSchema,
+    engine.CombinedSchema,
+    engine.QuestionsSchema,
+    engine.BatchEvaluationsSchema,
+]
+
+
+@pytest.mark.parametrize("schema", SCHEMAS)
+def test_generation_config_accepts_schema(schema):
+    # The SDK converts the schema locally, so a bad one fails here without any network I/O
+    config = generation_types.to_generation_config_dict(engine._generation_config(schema))
+    assert config["response_mime_type"] == "application/json"